@@ -1,6 +1,7 @@
 # ai.py
 # This file contains the logic for an AI player using the Google Gemini API.
 
+import asyncio
 import os
 import re
 from dotenv import load_dotenv
@@ -13,6 +14,22 @@ load_dotenv()
 # The API key is now passed directly to the client
 API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Matches a move in 4-character long algebraic notation, e.g. 'e2e4'
+_MOVE_RE = re.compile(r'[a-h][1-8][a-h][1-8]')
+
+# Prompt with legality requirement
+_PROMPT_TMPL = (
+    "You are a helpful chess assistant. Your goal is to identify the best possible move. "
+    "You must respond ONLY with the move in 4-character long algebraic notation (e.g., 'e2e4' or 'e4d5' for a capture). "
+    "Do not use 'x' for captures. Before responding, double-check that your chosen move is a legal move for the current player according to the provided FEN string. "
+    "Do not add any commentary or explanation.\n\n"
+    "Example:\n"
+    "User: Given the FEN string 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', what is the best move for the current player?\n"
+    "Model: e2e4\n\n"
+    "User: Given the FEN string '{fen}', what is the best move for the current player?\n"
+    "Model:"
+)
+
 class AIPlayer:
     """
     An AI player that uses a Google Gemini model to decide on a chess move.
@@ -25,62 +42,86 @@ class AIPlayer:
             # Use the newer genai.Client interface
             self.client = genai.Client(api_key=API_KEY)
             self.model = "gemini-2.5-flash"
+            self.generation_config = types.GenerateContentConfig(
+                temperature=0.4,
+                max_output_tokens=4096,
+                thinking_config=types.ThinkingConfig(
+                    thinking_budget=0,  # Disables thinking
+                ),
+            )
             print("Gemini AI Player initialized successfully.")
         except Exception as e:
             print(f"ERROR: Could not initialize Gemini client: {e}")
             self.client = None
 
-    def get_best_move(self, fen_string):
+    def get_best_move(self, board):
         """
-        Given the current board state in FEN, asks the AI for the best move via the Gemini API.
+        Given the current position as a python-chess Board, asks the AI for the best move via the Gemini API.
+        The prompt carries the position as FEN.
         """
         if not self.client:
             print(f"ERROR: Gemini client not initialized.")
             return None
 
-        # Prompt with legality requirement
-        prompt = (
-            "You are a helpful chess assistant. Your goal is to identify the best possible move. "
-            "You must respond ONLY with the move in 4-character long algebraic notation (e.g., 'e2e4' or 'e4d5' for a capture). "
-            "Do not use 'x' for captures. Before responding, double-check that your chosen move is a legal move for the current player according to the provided FEN string. "
-            "Do not add any commentary or explanation.\n\n"
-            "Example:\n"
-            "User: Given the FEN string 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', what is the best move for the current player?\n"
-            "Model: e2e4\n\n"
-            f"User: Given the FEN string '{fen_string}', what is the best move for the current player?\n"
-            "Model:"
-        )
-
-        generation_config = types.GenerateContentConfig(
-            temperature=0.4,
-            max_output_tokens=4096,
-            thinking_config=types.ThinkingConfig(
-                thinking_budget=0,  # Disables thinking
-            ),
-        )
-
         try:
             response = self.client.models.generate_content(
                 model=self.model,
-                contents=prompt,
-                config=generation_config
+                contents=self._build_prompt(board.fen()),
+                config=self.generation_config
             )
+            return self._extract_move(response)
 
-            # In google-genai, .text returns the combined output
-            if not response.candidates:
-                finish_reason = response.candidates[0].finish_reason if response.candidates else 'UNKNOWN'
-                print(f"ERROR: Gemini response was blocked or empty. Finish Reason: {finish_reason}")
-                return None
+        except Exception as e:
+            print(f"ERROR: An API request error occurred: {e}")
+            return None
 
-            response_text = response.text.strip()
-            match = re.search(r'[a-h][1-8][a-h][1-8]', response_text)
+    async def get_best_move_async(self, board):
+        """
+        Async version of get_best_move, also taking a python-chess Board. The request
+        runs on the client's async transport, so several positions can wait on the network at once.
+        """
+        if not self.client:
+            print(f"ERROR: Gemini client not initialized.")
+            return None
 
-            if match:
-                return match.group(0)
-            else:
-                print(f"ERROR: Could not find a valid move in AI response: '{response_text}'")
-                return None
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=self._build_prompt(board.fen()),
+                config=self.generation_config
+            )
+            return self._extract_move(response)
 
         except Exception as e:
             print(f"ERROR: An API request error occurred: {e}")
             return None
+
+    async def get_best_moves(self, boards):
+        """
+        Asks for the best move in several positions (python-chess Boards) concurrently,
+        e.g. for analysis or self-play. Returns the moves in the same order as boards,
+        with None for any position that failed.
+        """
+        return await asyncio.gather(
+            *(self.get_best_move_async(board) for board in boards))
+
+    def _build_prompt(self, fen_string):
+        """Builds the prompt asking for a move in the given position."""
+        return _PROMPT_TMPL.format(fen=fen_string)
+
+    def _extract_move(self, response):
+        """Pulls the move out of a Gemini response, or returns None."""
+        # In google-genai, .text returns the combined output
+        if not response.candidates:
+            finish_reason = response.candidates[0].finish_reason if response.candidates else 'UNKNOWN'
+            print(f"ERROR: Gemini response was blocked or empty. Finish Reason: {finish_reason}")
+            return None
+
+        response_text = response.text.strip()
+        match = _MOVE_RE.search(response_text)
+
+        if match:
+            return match.group(0)
+        else:
+            print(f"ERROR: Could not find a valid move in AI response: '{response_text}'")
+            return None
@@ -0,0 +1,238 @@
+# bitboard.py
+# Bitboard helpers and precomputed attack tables
+
+from config import BOARD_DIMENSION
+
+# A bitboard is an int whose bit (row * 8 + col) marks a square, so bit 0 is
+# a8 and bit 63 is h1.
+BB_ALL = (1 << 64) - 1
+
+ROOK_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2),
+                  (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0),
+                (1, 1))
+
+# --- Magic Numbers ---
+# Multipliers that map every blocker subset of a square's relevance mask to a
+# unique table index. Found offline with the usual sparse-random search for
+# this square numbering; they are only valid with the masks built below.
+ROOK_MAGICS = (
+    0x4080001040002080, 0x0100110020400084, 0x08801000800A2000,
+    0x0100090020041001, 0x1280080002810400, 0x4080010400020080,
+    0x0200280084020041, 0x6080004020801100, 0x0A04800040008420,
+    0x0002802004804000, 0x0A21004010200102, 0x0160800804801000,
+    0x0040800800820400, 0x8082001008020004, 0x0002800200800300,
+    0x108180208010C300, 0x0040008000204080, 0x4450084020004000,
+    0x4438808020081000, 0x0008008010000881, 0x0408008080040008,
+    0x0105010002080400, 0x9322808001000200, 0x4482020001004084,
+    0x8080004540002000, 0x3081020A00408020, 0x0000802200184200,
+    0x0202100100220900, 0x0000080080040080, 0x4040040080800200,
+    0x0100080400210290, 0x8040008200004401, 0xC540004224800081,
+    0x800020100040004A, 0x0100200080801002, 0x000100100300200A,
+    0x4404800800800400, 0x0116000402001008, 0x1085000401010200,
+    0x0000204402002081, 0x0880002000404000, 0x4000201000404000,
+    0x1020001000808026, 0x4030100008008080, 0x0400080004008080,
+    0xB422000410020009, 0x2611001200510004, 0x0C01001080410002,
+    0x8008801500204100, 0x0050400021008100, 0x0000104A00208200,
+    0x4810000921001500, 0x1101021088000500, 0x4004040080020080,
+    0x0888100882010400, 0xA008008061140A00, 0x1850201040800105,
+    0x40C48106220014C2, 0x000A200100094011, 0x1010000804201101,
+    0x980200880C20502A, 0x000100040002080B, 0x0282611812009004,
+    0xA292008100402C02,
+)
+
+BISHOP_MAGICS = (
+    0x0120013001010020, 0x0030125200420400, 0x0C08888102004002,
+    0x0918060044200020, 0x0801104012000000, 0x8002180404000000,
+    0x0114040242100100, 0x0005004100884040, 0x0022086004A08A06,
+    0x4102040802040026, 0x0005104090810000, 0x0000609081000101,
+    0x0800020210206110, 0x2420022820480080, 0x04400400A4110858,
+    0x0000004042082018, 0x1008114618104400, 0x0160001081125080,
+    0xC0010008044C0380, 0x0201069824050000, 0x0444044282A01040,
+    0x8000800100A02100, 0x100C10C222012401, 0x0E08805144248801,
+    0x042010C020440124, 0x1030084002082100, 0x1834900002042200,
+    0x0802080014004108, 0x5302040002008203, 0x0810044002880800,
+    0x0204041801208200, 0x1000404001010804, 0x012C044004201300,
+    0x0728211100080200, 0x0142004118100100, 0x4088510800040040,
+    0x0208060400201100, 0x0090044240020300, 0x2212008220011804,
+    0x0008009281010048, 0x002C100534009000, 0x04A9280A10002A00,
+    0x0081040426002402, 0x4200004208000080, 0x1001012011000200,
+    0x0201022806020040, 0x0023A80101080400, 0x0228011428200081,
+    0x0004108848080090, 0x8A84209808780040, 0x0000048201410010,
+    0x1200808020881010, 0x8080802002540000, 0x0080048810110100,
+    0x0040020801012008, 0x0150100208484020, 0x5016420804160288,
+    0xC10883B208024800, 0x0280841200AC0401, 0x0409504201084800,
+    0x0004002020CA4C00, 0x1000002204500080, 0x2000606002420840,
+    0x8040881101002100,
+)
+
+
+def iter_bits(bb):
+    """Yields the square index of each set bit, lowest first."""
+    while bb:
+        yield (bb & -bb).bit_length() - 1
+        bb &= bb - 1
+
+
+def _step_attacks(sq, offsets):
+    """Squares reached by a single step along each offset."""
+    attacks = 0
+    row, col = divmod(sq, BOARD_DIMENSION)
+    for dr, dc in offsets:
+        r, c = row + dr, col + dc
+        if 0 <= r < BOARD_DIMENSION and 0 <= c < BOARD_DIMENSION:
+            attacks |= 1 << (r * BOARD_DIMENSION + c)
+    return attacks
+
+
+def _ray_attacks(sq, occ, directions):
+    """Walks each direction up to and including the first blocker."""
+    attacks = 0
+    row, col = divmod(sq, BOARD_DIMENSION)
+    for dr, dc in directions:
+        r, c = row + dr, col + dc
+        while 0 <= r < BOARD_DIMENSION and 0 <= c < BOARD_DIMENSION:
+            bit = 1 << (r * BOARD_DIMENSION + c)
+            attacks |= bit
+            if occ & bit:
+                break
+            r, c = r + dr, c + dc
+    return attacks
+
+
+def _relevance_mask(sq, directions):
+    """Squares whose occupancy can block a ray (edge squares never can)."""
+    mask = 0
+    row, col = divmod(sq, BOARD_DIMENSION)
+    for dr, dc in directions:
+        r, c = row + dr, col + dc
+        while 0 <= r + dr < BOARD_DIMENSION and 0 <= c + dc < BOARD_DIMENSION:
+            mask |= 1 << (r * BOARD_DIMENSION + c)
+            r, c = r + dr, c + dc
+    return mask
+
+
+def _build_magic_entry(sq, directions, magic):
+    """Builds the (mask, magic, shift, table) lookup for one square."""
+    mask = _relevance_mask(sq, directions)
+    shift = 64 - mask.bit_count()
+    table = [0] * (1 << (64 - shift))
+    # Enumerate every subset of the mask (Carry-Rippler trick).
+    subset = 0
+    while True:
+        table[((subset * magic) & BB_ALL) >> shift] = _ray_attacks(
+            sq, subset, directions)
+        subset = (subset - mask) & mask
+        if not subset:
+            break
+    return mask, magic, shift, table
+
+
+KNIGHT_ATTACKS = tuple(_step_attacks(sq, KNIGHT_OFFSETS) for sq in range(64))
+KING_ATTACKS = tuple(_step_attacks(sq, KING_OFFSETS) for sq in range(64))
+# Squares a pawn on sq attacks, indexed [0] for white (moving toward row 0)
+# and [1] for black.
+PAWN_ATTACKS = (
+    tuple(_step_attacks(sq, ((-1, -1), (-1, 1))) for sq in range(64)),
+    tuple(_step_attacks(sq, ((1, -1), (1, 1))) for sq in range(64)),
+)
+PAWN_PUSHES = (
+    tuple(_step_attacks(sq, ((-1, 0),)) for sq in range(64)),
+    tuple(_step_attacks(sq, ((1, 0),)) for sq in range(64)),
+)
+
+ROOK_MAGIC = tuple(
+    _build_magic_entry(sq, ROOK_DIRECTIONS, ROOK_MAGICS[sq])
+    for sq in range(64))
+BISHOP_MAGIC = tuple(
+    _build_magic_entry(sq, BISHOP_DIRECTIONS, BISHOP_MAGICS[sq])
+    for sq in range(64))
+
+
+def rook_attacks(sq, occ):
+    """Squares a rook on sq attacks given the occupancy bitboard occ."""
+    mask, magic, shift, table = ROOK_MAGIC[sq]
+    return table[((occ & mask) * magic & BB_ALL) >> shift]
+
+
+def bishop_attacks(sq, occ):
+    """Squares a bishop on sq attacks given the occupancy bitboard occ."""
+    mask, magic, shift, table = BISHOP_MAGIC[sq]
+    return table[((occ & mask) * magic & BB_ALL) >> shift]
+
+
+def _build_line_tables():
+    """Builds the BETWEEN and LINE tables for every pair of squares."""
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for attacks in (rook_attacks, bishop_attacks):
+            for b in iter_bits(attacks(a, 0)):
+                between[a][b] = attacks(a, 1 << b) & attacks(b, 1 << a)
+                line[a][b] = (attacks(a, 0) & attacks(b, 0)) | (1 << a) | (
+                    1 << b)
+    return tuple(map(tuple, between)), tuple(map(tuple, line))
+
+
+# BETWEEN[a][b]: squares strictly between two aligned squares.
+# LINE[a][b]: the whole rank, file or diagonal through two aligned squares.
+# Both are 0 when the squares do not share a line.
+BETWEEN, LINE = _build_line_tables()
+
+
+# --- Attack Queries ---
+# These take the position as plain ints plus a bitboard dict keyed like
+# Game.bb ('wP', 'bK', ...), so they don't depend on the Game object.
+def attackers_to(bb, sq, by_white, occ):
+    """Returns the bitboard of the given side's pieces attacking sq.
+
+    Attacks are symmetric, so instead of generating every enemy move this
+    places each piece type on sq and intersects its attacks with the enemy
+    pieces of that type. occ is the occupancy the sliders see.
+    """
+    if by_white:
+        pawns, knights, bishops = bb['wP'], bb['wN'], bb['wB']
+        rooks, queens, kings = bb['wR'], bb['wQ'], bb['wK']
+        # White pawns attacking sq stand where a black pawn on sq attacks.
+        pawn_attacks = PAWN_ATTACKS[1][sq]
+    else:
+        pawns, knights, bishops = bb['bP'], bb['bN'], bb['bB']
+        rooks, queens, kings = bb['bR'], bb['bQ'], bb['bK']
+        pawn_attacks = PAWN_ATTACKS[0][sq]
+    return ((pawn_attacks & pawns) | (KNIGHT_ATTACKS[sq] & knights)
+            | (KING_ATTACKS[sq] & kings)
+            | (rook_attacks(sq, occ) & (rooks | queens))
+            | (bishop_attacks(sq, occ) & (bishops | queens)))
+
+
+def pins_and_checkers(bb, king_sq, is_white, own_occ, enemy_occ):
+    """Returns (pinned, checkers, check_ray) for the king on king_sq.
+
+    pinned holds that side's pieces pinned to their king, checkers the enemy
+    pieces giving check, and check_ray the squares a non-king move must land
+    on: anywhere when not in check, the checker or a square between it and the
+    king in single check, nowhere in double check.
+    """
+    occ = own_occ | enemy_occ
+    checkers = attackers_to(bb, king_sq, not is_white, occ)
+    if not checkers:
+        check_ray = BB_ALL
+    elif checkers & (checkers - 1):
+        check_ray = 0
+    else:
+        check_ray = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+
+    # Enemy sliders that would see the king through our own pieces.
+    enemy = 'b' if is_white else 'w'
+    queens = bb[enemy + 'Q']
+    snipers = ((rook_attacks(king_sq, enemy_occ) & (bb[enemy + 'R'] | queens))
+               | (bishop_attacks(king_sq, enemy_occ) &
+                  (bb[enemy + 'B'] | queens)))
+    pinned = 0
+    for sniper_sq in iter_bits(snipers):
+        blockers = BETWEEN[king_sq][sniper_sq] & occ
+        if blockers and not blockers & (blockers - 1) and blockers & own_occ:
+            pinned |= blockers
+    return pinned, checkers, check_ray
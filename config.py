@@ -6,6 +6,13 @@ BOARD_DIMENSION = 8
 WINDOW_SIZE = SQUARE_SIZE * BOARD_DIMENSION
 UI_HEIGHT = 180
 
+# --- Rendering ---
+TEXT_CACHE_SIZE = 64  # Rendered UI strings kept, least recently used dropped first
+# Past either limit a full flip is cheaper than updating the dirty rects one by one
+DIRTY_AREA_LIMIT = 0.5 * WINDOW_SIZE * (WINDOW_SIZE + UI_HEIGHT)
+DIRTY_RECT_LIMIT = 50
+FRAME_TIME = 1 / 60  # Seconds per main-loop iteration
+
 # --- Colors ---
 COLOR_LIGHT_SQUARE = (240, 217, 181)
 COLOR_DARK_SQUARE = (181, 136, 99)
@@ -1,13 +1,57 @@
 # engine.py
 # Game logic and state management
 
+import random
 import time
-from config import BOARD_DIMENSION, PIECE_SYMBOLS
-from pieces import Pawn, Rook, Knight, Bishop, Queen, King
+import chess
+from config import BOARD_DIMENSION
+from pieces import (PIECES, EMPTY, BLACK, KIND_MASK, piece_code, KIND_P,
+                    KIND_N, KIND_B, KIND_R, KIND_Q, KIND_K)
+from bitboard import (BB_ALL, iter_bits, attackers_to, pins_and_checkers,
+                      LINE, PAWN_ATTACKS)
+
+# --- Zobrist Keys ---
+# One random 64-bit key per piece kind and square, plus one for black to
+# move. A position's hash is the XOR of the keys that apply to it, so a move
+# only has to XOR out what left a square and XOR in what arrived. Seeded so
+# hashes are stable between runs.
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST = {
+    color + name: tuple(_zobrist_rng.getrandbits(64) for _ in range(64))
+    for color in 'wb' for name in 'PNBRQK'
+}
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+_PROMO_MAP = {'Q': KIND_Q, 'R': KIND_R, 'B': KIND_B, 'N': KIND_N}
+
+# Per piece code: its bitboard/Zobrist key and its FEN letter.
+_CODE_KEYS = tuple(piece and piece.key for piece in PIECES)
+_CODE_SYMBOLS = tuple(piece and piece.symbol for piece in PIECES)
+# Kind bits of a king's code, to spot kings in _set_square.
+_KING_BITS = piece_code(KIND_K, False)
+
+# Moves handed back by undo_last_move, reused by Move.acquire.
+_MOVE_POOL = []
+
+# --- Castling Rights ---
+# Bits of Game.castling, in FEN order KQkq.
+CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ = 8, 4, 2, 1
+# Rights lost when a move starts or ends on a square: a king leaving home
+# drops both of its side's bits, a rook leaving (or being captured on) its
+# corner drops that corner's bit. All other squares lose nothing.
+_CASTLING_LOSS = [0] * 64
+_CASTLING_LOSS[0] = CASTLE_BQ
+_CASTLING_LOSS[4] = CASTLE_BK | CASTLE_BQ
+_CASTLING_LOSS[7] = CASTLE_BK
+_CASTLING_LOSS[56] = CASTLE_WQ
+_CASTLING_LOSS[60] = CASTLE_WK | CASTLE_WQ
+_CASTLING_LOSS[63] = CASTLE_WK
+_CASTLING_LOSS = tuple(_CASTLING_LOSS)
 
 
 class Player:
     """Represents a chess player."""
+    __slots__ = ('name', 'is_player1', 'color')
 
     def __init__(self, name, is_player1):
         self.name = name
@@ -17,6 +61,10 @@ class Player:
 
 class Move:
     """Represents a single chess move, including its duration and special flags."""
+    # One Move is kept per ply, so drop the per-instance __dict__.
+    __slots__ = ('piece_moved', 'start_coords', 'end_coords', 'piece_captured',
+                 'is_promotion', 'promoted_piece', 'turn_duration', 'is_castling', 'is_en_passant',
+                 'castling_before', 'halfmove_before', 'history_before')
 
     def __init__(self,
                  piece_moved,
@@ -25,20 +73,41 @@ class Move:
                  piece_captured=None,
                  is_promotion=False,
                  promoted_piece=None,
-                 piece_had_moved=False,
                  turn_duration=0.0,
                  is_castling=False,
-                 is_en_passant=False):
+                 is_en_passant=False,
+                 castling_before=0,
+                 halfmove_before=0,
+                 history_before=None):
         self.piece_moved = piece_moved
         self.start_coords = start_coords
         self.end_coords = end_coords
         self.piece_captured = piece_captured
         self.is_promotion = is_promotion
         self.promoted_piece = promoted_piece
-        self.piece_had_moved = piece_had_moved
         self.turn_duration = turn_duration
         self.is_castling = is_castling
         self.is_en_passant = is_en_passant
+        self.castling_before = castling_before
+        self.halfmove_before = halfmove_before
+        # Repetition counts replaced by this move, if it was irreversible.
+        self.history_before = history_before
+
+    @classmethod
+    def acquire(cls, *args):
+        """Returns a Move built from args, recycling a pooled one if any."""
+        if not _MOVE_POOL: return cls(*args)
+        move = _MOVE_POOL.pop()
+        move.__init__(*args)
+        return move
+
+    def to_uci(self):
+        """Returns the move in UCI long algebraic notation, e.g. 'e2e4' or 'e7e8q'."""
+        uci = "".join(f"{chr(ord('a') + c)}{8 - r}"
+                      for r, c in (self.start_coords, self.end_coords))
+        if self.is_promotion:
+            uci += self.promoted_piece.name.lower()
+        return uci
 
     def to_notation(self):
         """Generates simple algebraic notation for the move."""
@@ -60,8 +129,16 @@ class Game:
     """The main game engine that manages chess logic and state."""
 
     def __init__(self):
-        self.board = [[None for _ in range(BOARD_DIMENSION)]
-                      for _ in range(BOARD_DIMENSION)]
+        # Flat board of piece codes indexed by square, sq = row * 8 + col.
+        self.board = bytearray(BOARD_DIMENSION * BOARD_DIMENSION)
+        # One bitboard per color/piece type, plus occupancy per side.
+        self.bb = {}
+        self.occ_w = 0
+        self.occ_b = 0
+        self.occ_all = 0
+        self.zobrist = 0
+        # King square per side, [white, black]; kept current by _set_square.
+        self.king_sq = [None, None]
         self.players = [Player("White", True), Player("Black", False)]
         self.current_player_index = 0
         self.game_state = 'active'
@@ -72,7 +149,21 @@ class Game:
         self.white_turn_time = 0
         self.black_turn_time = 0
         self.halfmove_clock = 0
+        # Castling rights as CASTLE_* bits; only ever cleared by a move.
+        self.castling = CASTLE_WK | CASTLE_WQ | CASTLE_BK | CASTLE_BQ
+        # Repetition counts by hash, only since the last pawn move or capture:
+        # no earlier position can recur after one.
         self.position_history = {}
+        # Legal moves per square for the current position; cleared whenever
+        # a move is made or undone.
+        self._legal_cache = {}
+        # (pinned, checkers, check_ray) bitboards per side, same lifetime;
+        # also answers is_in_check.
+        self._pin_cache = {}
+        # python-chess mirror of the game for engine players. Its move stack
+        # trails move_history and is caught up by to_py_board, so make_move
+        # never pays for it.
+        self._py_board = chess.Board()
         self._place_pieces()
         self._update_position_history()
 
@@ -93,9 +184,20 @@ class Game:
     def undo_last_move(self):
         if not self.move_history: return
         move = self.move_history.pop()
+        if len(self._py_board.move_stack) > len(self.move_history):
+            self._py_board.pop()
+
+        pos_hash = self._get_position_hash()
+        if self.position_history.get(pos_hash, 0) > 1:
+            self.position_history[pos_hash] -= 1
+        else:
+            self.position_history.pop(pos_hash, None)
+        if move.history_before is not None:
+            self.position_history = move.history_before
+        self.halfmove_clock = move.halfmove_before
 
         self.set_piece_at(move.start_coords, move.piece_moved)
-        move.piece_moved.has_moved = move.piece_had_moved
+        self.castling = move.castling_before
 
         if move.is_castling:
             rook_start_col = 7 if move.end_coords[1] > move.start_coords[
@@ -104,7 +206,6 @@ class Game:
             rook = self.get_piece_at((move.start_coords[0], rook_end_col))
             self.set_piece_at((move.start_coords[0], rook_start_col), rook)
             self.set_piece_at((move.start_coords[0], rook_end_col), None)
-            if rook: rook.has_moved = False
             self.set_piece_at(move.end_coords, None)
         elif move.is_en_passant:
             captured_pawn_row = move.start_coords[0]
@@ -124,34 +225,37 @@ class Game:
             self.black_turn_time -= move.turn_duration
 
         self.current_player_index = 1 - self.current_player_index
+        self.zobrist ^= ZOBRIST_SIDE
         self.turn_start_time = time.time()
+        self._legal_cache.clear()
+        self._pin_cache.clear()
         self._update_game_status()
+        _MOVE_POOL.append(move)
 
     def get_legal_moves_for_piece(self, coords):
-        piece = self.get_piece_at(coords)
-        if not piece: return []
-
-        pseudo_legal_moves = piece.get_moves(self.board, coords,
-                                             self.move_history)
-        if isinstance(piece, King):
-            pseudo_legal_moves.extend(self._get_castling_moves(coords))
-
-        legal_moves = []
-        for move_coords in pseudo_legal_moves:
-            if not self._move_results_in_check(coords, move_coords):
-                legal_moves.append(move_coords)
-        return legal_moves
+        """Returns the legal destinations for the piece at coords."""
+        return [
+            divmod(to_sq, BOARD_DIMENSION) for to_sq in
+            self._get_legal_squares(coords[0] * BOARD_DIMENSION + coords[1])
+        ]
 
     def is_in_check(self, player):
-        king_pos = self._find_piece_by_type(King, player)
-        return self._is_square_attacked(
-            king_pos, not player.is_player1) if king_pos else False
+        return self._get_pins_and_checkers(player.is_player1)[1] != 0
 
     def get_piece_at(self, coords):
-        return self.board[coords[0]][coords[1]]
+        """Returns the shared Piece on coords, or None if it is empty."""
+        return PIECES[self.board[coords[0] * BOARD_DIMENSION + coords[1]]]
 
     def set_piece_at(self, coords, piece):
-        self.board[coords[0]][coords[1]] = piece
+        self._set_square(coords[0] * BOARD_DIMENSION + coords[1],
+                         piece.code if piece else EMPTY)
+
+    def piece_positions(self):
+        """Yields (piece, row, col) for every piece on the board."""
+        board = self.board
+        for sq in iter_bits(self.occ_all):
+            r, c = divmod(sq, BOARD_DIMENSION)
+            yield PIECES[board[sq]], r, c
 
     def get_current_player(self):
         return self.players[self.current_player_index]
@@ -164,53 +268,20 @@ class Game:
 
     def to_fen(self):
         """Generates the Forsyth-Edwards Notation (FEN) string for the current game state."""
-        fen_board = ""
-        for r in range(BOARD_DIMENSION):
-            empty_squares = 0
-            for c in range(BOARD_DIMENSION):
-                piece = self.board[r][c]
-                if piece:
-                    if empty_squares > 0:
-                        fen_board += str(empty_squares)
-                        empty_squares = 0
-                    symbol = PIECE_SYMBOLS[piece.color][piece.name]
-                    fen_board += symbol
-                else:
-                    empty_squares += 1
-            if empty_squares > 0:
-                fen_board += str(empty_squares)
-            if r < BOARD_DIMENSION - 1:
-                fen_board += '/'
+        fen_board = "/".join(
+            self._encode_fen_row(r) for r in range(BOARD_DIMENSION))
 
         active_color = 'w' if self.current_player_index == 0 else 'b'
 
-        castling_rights = ""
-        king_w = self.get_piece_at((7, 4))
-        rook_wk = self.get_piece_at((7, 7))
-        if isinstance(king_w, King) and not king_w.has_moved and isinstance(
-                rook_wk, Rook) and not rook_wk.has_moved:
-            castling_rights += "K"
-        rook_wq = self.get_piece_at((7, 0))
-        if isinstance(king_w, King) and not king_w.has_moved and isinstance(
-                rook_wq, Rook) and not rook_wq.has_moved:
-            castling_rights += "Q"
-        king_b = self.get_piece_at((0, 4))
-        rook_bk = self.get_piece_at((0, 7))
-        if isinstance(king_b, King) and not king_b.has_moved and isinstance(
-                rook_bk, Rook) and not rook_bk.has_moved:
-            castling_rights += "k"
-        rook_bq = self.get_piece_at((0, 0))
-        if isinstance(king_b, King) and not king_b.has_moved and isinstance(
-                rook_bq, Rook) and not rook_bq.has_moved:
-            castling_rights += "q"
-        if not castling_rights: castling_rights = "-"
+        castling_rights = "".join(
+            c for c, b in zip("KQkq", (CASTLE_WK, CASTLE_WQ, CASTLE_BK,
+                                       CASTLE_BQ)) if self.castling & b) or "-"
 
         en_passant_target = "-"
         if self.move_history:
             last_move = self.move_history[-1]
-            if isinstance(last_move.piece_moved,
-                          Pawn) and abs(last_move.start_coords[0] -
-                                        last_move.end_coords[0]) == 2:
+            if last_move.piece_moved.kind == KIND_P and abs(
+                    last_move.start_coords[0] - last_move.end_coords[0]) == 2:
                 target_row = (last_move.start_coords[0] +
                               last_move.end_coords[0]) // 2
                 target_col = last_move.start_coords[1]
@@ -223,64 +294,151 @@ class Game:
             halfmove_clock, fullmove_number
         ])
 
+    def to_py_board(self):
+        """Returns a python-chess Board of the current position, with its move
+        stack, for an engine player to own."""
+        board = self._py_board
+        for move in self.move_history[len(board.move_stack):]:
+            board.push(chess.Move.from_uci(move.to_uci()))
+        return board.copy()
+
     # --- Helper Methods ---
+    def _get_legal_squares(self, sq):
+        """Returns the legal destination squares for the piece on sq.
+
+        The list is cached until the next move or undo, so callers must not
+        modify it.
+        """
+        cached = self._legal_cache.get(sq)
+        if cached is not None: return cached
+        piece = PIECES[self.board[sq]]
+        if not piece: return []
+
+        own_occ, enemy_occ = (self.occ_w, self.occ_b) if piece.is_player1 \
+            else (self.occ_b, self.occ_w)
+        targets = piece.get_moves(sq, own_occ, enemy_occ, self.move_history)
+        if piece.kind == KIND_K:
+            targets |= self._get_castling_moves(sq)
+
+        legal_moves = list(iter_bits(self._filter_legal_moves(piece, sq,
+                                                              targets)))
+        self._legal_cache[sq] = legal_moves
+        return legal_moves
+
+    def _set_square(self, sq, code):
+        """Places a piece code (EMPTY to clear) on sq, keeping bitboards in sync."""
+        bit = 1 << sq
+        old_code = self.board[sq]
+        if old_code:
+            key = _CODE_KEYS[old_code]
+            self.bb[key] ^= bit
+            self.zobrist ^= ZOBRIST[key][sq]
+            if old_code & BLACK: self.occ_b ^= bit
+            else: self.occ_w ^= bit
+        if code:
+            key = _CODE_KEYS[code]
+            self.bb[key] ^= bit
+            self.zobrist ^= ZOBRIST[key][sq]
+            if code & BLACK: self.occ_b ^= bit
+            else: self.occ_w ^= bit
+            if code & KIND_MASK == _KING_BITS:
+                self.king_sq[1 if code & BLACK else 0] = sq
+        self.occ_all = self.occ_w | self.occ_b
+        self.board[sq] = code
+
+    def _encode_fen_row(self, r):
+        """Encodes one board row as a FEN piece-placement field."""
+        row_str, next_col = "", 0
+        row_occ = (self.occ_all >> (r * BOARD_DIMENSION)) & 0xFF
+        for c in iter_bits(row_occ):
+            if c > next_col:
+                row_str += str(c - next_col)
+            row_str += _CODE_SYMBOLS[self.board[r * BOARD_DIMENSION + c]]
+            next_col = c + 1
+        if next_col < BOARD_DIMENSION:
+            row_str += str(BOARD_DIMENSION - next_col)
+        return row_str
+
     def _place_pieces(self):
-        for col in range(BOARD_DIMENSION):
-            self.board[1][col], self.board[6][col] = Pawn(False), Pawn(True)
-        piece_order = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
-        for col, piece in enumerate(piece_order):
-            self.board[0][col], self.board[7][col] = piece(False), piece(True)
+        board, n = self.board, BOARD_DIMENSION
+        for col in range(n):
+            board[n + col] = piece_code(KIND_P, True)
+            board[6 * n + col] = piece_code(KIND_P, False)
+        piece_order = [KIND_R, KIND_N, KIND_B, KIND_Q, KIND_K, KIND_B, KIND_N,
+                       KIND_R]
+        for col, kind in enumerate(piece_order):
+            board[col] = piece_code(kind, True)
+            board[7 * n + col] = piece_code(kind, False)
+        self.bb = {
+            'wP': 0x00FF000000000000, 'wN': 0x4200000000000000,
+            'wB': 0x2400000000000000, 'wR': 0x8100000000000000,
+            'wQ': 0x0800000000000000, 'wK': 0x1000000000000000,
+            'bP': 0x000000000000FF00, 'bN': 0x0000000000000042,
+            'bB': 0x0000000000000024, 'bR': 0x0000000000000081,
+            'bQ': 0x0000000000000008, 'bK': 0x0000000000000010
+        }
+        self.occ_w = 0xFFFF000000000000
+        self.occ_b = 0x000000000000FFFF
+        self.occ_all = self.occ_w | self.occ_b
+        self.king_sq = [7 * n + 4, 4]
+        self.zobrist = 0
+        for key, bb in self.bb.items():
+            for sq in iter_bits(bb):
+                self.zobrist ^= ZOBRIST[key][sq]
 
     def _execute_board_move(self, start_coords, end_coords, promotion_choice,
                             elapsed_time):
-        piece = self.get_piece_at(start_coords)
-        captured_piece = self.get_piece_at(end_coords)
-
-        if isinstance(piece, Pawn) or captured_piece is not None:
+        board = self.board
+        start_sq = start_coords[0] * BOARD_DIMENSION + start_coords[1]
+        end_sq = end_coords[0] * BOARD_DIMENSION + end_coords[1]
+        code, captured_code = board[start_sq], board[end_sq]
+        piece = PIECES[code]
+
+        is_pawn = piece.kind == KIND_P
+        halfmove_before, history_before = self.halfmove_clock, None
+        if is_pawn or captured_code:
             self.halfmove_clock = 0
+            history_before = self.position_history
+            self.position_history = {}
         else:
             self.halfmove_clock += 1
 
-        piece_had_moved, is_castling, is_en_passant = piece.has_moved, False, False
+        is_castling, is_en_passant = False, False
+        castling_before = self.castling
+        self.castling &= ~(_CASTLING_LOSS[start_sq] | _CASTLING_LOSS[end_sq])
 
-        if isinstance(piece,
-                      King) and abs(start_coords[1] - end_coords[1]) == 2:
+        if piece.kind == KIND_K and abs(start_coords[1] - end_coords[1]) == 2:
             is_castling = True
-            rook_start_col = 7 if end_coords[1] > start_coords[1] else 0
-            rook_end_col = 5 if rook_start_col == 7 else 3
-            rook = self.get_piece_at((start_coords[0], rook_start_col))
-            self.set_piece_at((start_coords[0], rook_end_col), rook)
-            self.set_piece_at((start_coords[0], rook_start_col), None)
-            if rook: rook.has_moved = True
-        elif isinstance(
-                piece, Pawn
-        ) and start_coords[1] != end_coords[1] and captured_piece is None:
+            row = start_sq - start_coords[1]  # Square of the row's a-file
+            rook_start_sq, rook_end_sq = (row + 7, row + 5) \
+                if end_coords[1] > start_coords[1] else (row, row + 3)
+            self._set_square(rook_end_sq, board[rook_start_sq])
+            self._set_square(rook_start_sq, EMPTY)
+        elif is_pawn and start_coords[1] != end_coords[1] and not captured_code:
             is_en_passant = True
-            captured_pawn_row = start_coords[0]
-            captured_pawn_col = end_coords[1]
-            captured_piece = self.get_piece_at(
-                (captured_pawn_row, captured_pawn_col))
-            self.set_piece_at((captured_pawn_row, captured_pawn_col), None)
+            captured_sq = start_sq - start_coords[1] + end_coords[1]
+            captured_code = board[captured_sq]
+            self._set_square(captured_sq, EMPTY)
 
+        captured_piece = PIECES[captured_code]
         if captured_piece:
             if piece.is_player1: self.black_captured.append(captured_piece)
             else: self.white_captured.append(captured_piece)
 
         promoted_piece = None
-        is_promotion = isinstance(piece, Pawn) and end_coords[0] in (0, 7)
+        is_promotion = is_pawn and end_coords[0] in (0, 7)
         if is_promotion:
-            piece_map = {'Q': Queen, 'R': Rook, 'B': Bishop, 'N': Knight}
-            promoted_class = piece_map.get(promotion_choice, Queen)
-            promoted_piece = promoted_class(piece.is_player1)
-            self.set_piece_at(end_coords, promoted_piece)
+            promoted_kind = _PROMO_MAP.get(promotion_choice, KIND_Q)
+            promoted_piece = PIECES[piece_code(promoted_kind, code & BLACK)]
+            self._set_square(end_sq, promoted_piece.code)
         else:
-            self.set_piece_at(end_coords, piece)
+            self._set_square(end_sq, code)
 
-        self.set_piece_at(start_coords, None)
-        piece.has_moved = True
-        return Move(piece, start_coords, end_coords, captured_piece,
-                    is_promotion, promoted_piece, piece_had_moved,
-                    elapsed_time, is_castling, is_en_passant)
+        self._set_square(start_sq, EMPTY)
+        return Move.acquire(piece, start_coords, end_coords, captured_piece,
+                            is_promotion, promoted_piece, elapsed_time,
+                            is_castling, is_en_passant, castling_before,
+                            halfmove_before, history_before)
 
     def _update_game_after_move(self, move):
         self.move_history.append(move)
@@ -290,6 +448,9 @@ class Game:
             self.black_turn_time += move.turn_duration
         self.turn_start_time = time.time()
         self.current_player_index = 1 - self.current_player_index
+        self.zobrist ^= ZOBRIST_SIDE
+        self._legal_cache.clear()
+        self._pin_cache.clear()
         self._update_position_history()
         self._update_game_status()
 
@@ -305,22 +466,18 @@ class Game:
             return
 
         player = self.get_current_player()
-        has_legal_move = any(
-            self.get_legal_moves_for_piece((r, c))
-            for r, c in self._iterate_squares()
-            if self.get_piece_at((r, c)) and self.get_piece_at((
-                r, c)).is_player1 == player.is_player1)
-
-        if not has_legal_move:
-            self.game_state = 'checkmate' if self.is_in_check(
-                player) else 'stalemate'
+        own_occ = self.occ_w if player.is_player1 else self.occ_b
+        in_check = self.is_in_check(player)
+        # Stop at the first piece that can move.
+        for sq in iter_bits(own_occ):
+            if self._get_legal_squares(sq):
+                self.game_state = 'check' if in_check else 'active'
+                break
         else:
-            self.game_state = 'check' if self.is_in_check(player) else 'active'
+            self.game_state = 'checkmate' if in_check else 'stalemate'
 
     def _get_position_hash(self):
-        board_str = "".join(p.name + p.color[0] if p else ' '
-                            for r in self.board for p in r)
-        return board_str + str(self.current_player_index)
+        return self.zobrist
 
     def _update_position_history(self):
         pos_hash = self._get_position_hash()
@@ -328,70 +485,106 @@ class Game:
             pos_hash, 0) + 1
 
     def _check_insufficient_material(self):
-        pieces = [
-            p for r, c in self._iterate_squares()
-            if (p := self.get_piece_at((r, c)))
-        ]
-        if len(pieces) <= 3:
-            if len(pieces) == 2: return True
-            if len(pieces) == 3:
-                piece_names = {p.name for p in pieces}
-                if 'B' in piece_names or 'N' in piece_names:
-                    return True
+        total = self.occ_all.bit_count()
+        if total == 2: return True
+        if total == 3:
+            bb = self.bb
+            minors = bb['wN'] | bb['bN'] | bb['wB'] | bb['bB']
+            return minors.bit_count() == 1
         return False
 
-    def _get_castling_moves(self, king_coords):
-        moves = []
-        if self.is_in_check(self.get_current_player()): return moves
-        row, col = king_coords
-        player_is_white = self.get_current_player().is_player1
-        # Kingside
-        rook_kingside = self.get_piece_at((row, 7))
-        if isinstance(rook_kingside, Rook) and not rook_kingside.has_moved:
-            if self.get_piece_at((row, 5)) is None and self.get_piece_at(
-                (row, 6)) is None:
-                if not self._is_square_attacked((row, 5), not player_is_white) and \
-                   not self._is_square_attacked((row, 6), not player_is_white):
-                    moves.append((row, 6))
-        # Queenside
-        rook_queenside = self.get_piece_at((row, 0))
-        if isinstance(rook_queenside, Rook) and not rook_queenside.has_moved:
-            if self.get_piece_at((row, 1)) is None and self.get_piece_at(
-                (row, 2)) is None and self.get_piece_at((row, 3)) is None:
-                if not self._is_square_attacked((row, 2), not player_is_white) and \
-                   not self._is_square_attacked((row, 3), not player_is_white):
-                    moves.append((row, 2))
+    def _get_castling_moves(self, king_sq):
+        """Returns the bitboard of castling targets for the king on king_sq."""
+        moves = 0
+        player_is_white = not self.board[king_sq] & BLACK
+        kingside, queenside = (CASTLE_WK, CASTLE_WQ) if player_is_white \
+            else (CASTLE_BK, CASTLE_BQ)
+        if not self.castling & (kingside | queenside): return moves
+        if self._get_pins_and_checkers(player_is_white)[1]: return moves
+        row = king_sq - king_sq % BOARD_DIMENSION  # Square of the row's a-file
+        # Kingside: f and g empty
+        if self.castling & kingside and not self.occ_all >> (row + 5) & 0b11:
+            if not self._is_square_attacked(row + 5, not player_is_white) and \
+               not self._is_square_attacked(row + 6, not player_is_white):
+                moves |= 1 << (row + 6)
+        # Queenside: b, c and d empty
+        if self.castling & queenside and not self.occ_all >> (row + 1) & 0b111:
+            if not self._is_square_attacked(row + 2, not player_is_white) and \
+               not self._is_square_attacked(row + 3, not player_is_white):
+                moves |= 1 << (row + 2)
         return moves
 
-    def _is_square_attacked(self, coords, by_player_is_white):
-        for r, c in self._iterate_squares():
-            piece = self.get_piece_at((r, c))
-            if piece and piece.is_player1 == by_player_is_white:
-                if coords in piece.get_moves(self.board, (r, c),
-                                             self.move_history):
-                    return True
-        return False
-
-    def _move_results_in_check(self, start_coords, end_coords):
-        piece = self.get_piece_at(start_coords)
-        captured_piece = self.get_piece_at(end_coords)
-        self.set_piece_at(end_coords, piece)
-        self.set_piece_at(start_coords, None)
-        in_check = self.is_in_check(self.get_current_player())
-        self.set_piece_at(start_coords, piece)
-        self.set_piece_at(end_coords, captured_piece)
+    def _is_square_attacked(self, sq, by_player_is_white):
+        return attackers_to(self.bb, sq, by_player_is_white, self.occ_all) != 0
+
+    def _get_pins_and_checkers(self, is_white):
+        """Returns (pinned, checkers, check_ray) bitboards for one side.
+
+        Cached until the next move or undo.
+        """
+        pin_info = self._pin_cache.get(is_white)
+        if pin_info is None:
+            king_sq = self.king_sq[0 if is_white else 1]
+            if king_sq is None:
+                pin_info = 0, 0, BB_ALL
+            else:
+                own_occ, enemy_occ = (self.occ_w, self.occ_b) if is_white \
+                    else (self.occ_b, self.occ_w)
+                pin_info = pins_and_checkers(self.bb, king_sq, is_white,
+                                             own_occ, enemy_occ)
+            self._pin_cache[is_white] = pin_info
+        return pin_info
+
+    def _filter_legal_moves(self, piece, from_sq, targets):
+        """Narrows a bitboard of pseudo-legal targets to the legal ones."""
+        is_white = piece.is_player1
+        pinned, checkers, check_ray = self._get_pins_and_checkers(is_white)
+
+        if piece.kind == KIND_K:
+            # Lift the king so sliders checking it also cover the squares
+            # behind it along the same line.
+            occ = self.occ_all ^ (1 << from_sq)
+            for to_sq in iter_bits(targets):
+                if attackers_to(self.bb, to_sq, not is_white, occ):
+                    targets ^= 1 << to_sq
+            return targets
+
+        allowed = check_ray
+        if pinned >> from_sq & 1:
+            allowed &= LINE[self.king_sq[0 if is_white else 1]][from_sq]
+        if piece.kind != KIND_P:
+            return targets & allowed
+        # A pawn capture onto an empty square is en passant, which removes two
+        # pieces from the same rank and can expose the king in ways a pin does
+        # not describe.
+        en_passant = targets & PAWN_ATTACKS[0 if is_white else 1][from_sq] \
+            & ~self.occ_all
+        legal = targets & ~en_passant & allowed
+        for to_sq in iter_bits(en_passant):
+            if not self._move_results_in_check(from_sq, to_sq):
+                legal |= 1 << to_sq
+        return legal
+
+    def _move_results_in_check(self, from_sq, to_sq):
+        """Tries an en passant capture on the bitboards and tests king safety.
+
+        Only the two pawn bitboards are XORed in and back out; the board and
+        hash are never touched.
+        """
+        code = self.board[from_sq]
+        # The captured pawn sits beside the mover, on the destination file.
+        captured_sq = from_sq - from_sq % BOARD_DIMENSION + to_sq % BOARD_DIMENSION
+        captured_bb = 1 << captured_sq
+        move_delta = 1 << from_sq | 1 << to_sq
+        own_key = _CODE_KEYS[code]
+        enemy_key = _CODE_KEYS[self.board[captured_sq]]
+        bb = self.bb
+        bb[own_key] ^= move_delta
+        bb[enemy_key] ^= captured_bb
+        is_white = not code & BLACK
+        in_check = attackers_to(bb, self.king_sq[0 if is_white else 1],
+                                not is_white,
+                                self.occ_all ^ move_delta ^ captured_bb) != 0
+        bb[own_key] ^= move_delta
+        bb[enemy_key] ^= captured_bb
         return in_check
-
-    def _iterate_squares(self):
-        for r in range(BOARD_DIMENSION):
-            for c in range(BOARD_DIMENSION):
-                yield r, c
-
-    def _find_piece_by_type(self, piece_type, player):
-        for r, c in self._iterate_squares():
-            piece = self.board[r][c]
-            if isinstance(
-                    piece,
-                    piece_type) and piece.is_player1 == player.is_player1:
-                return (r, c)
-        return None
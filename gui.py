@@ -6,18 +6,34 @@ import sys
 import time
 import threading
 from config import *
-from engine import Game, Pawn
+from engine import Game
+from pieces import PIECES, KIND_P
 from ai import AIPlayer
 from stockfish import StockfishPlayer
 
+# pygame-ce adds Surface.fblits, a faster batch blit; plain pygame falls back
+# to blits().
+IS_CE = getattr(pygame, 'IS_CE', False)
+
+# Window events after which the screen has to be drawn again, whoever is to move.
+REPAINT_EVENTS = (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE, pygame.WINDOWSHOWN, pygame.WINDOWRESTORED)
+
 class ChessGUI:
     """Manages the graphical user interface using Pygame."""
     def __init__(self):
         pygame.init()
+        if not IS_CE: print("WARNING: pygame-ce not found; install it (see requirements.txt) for faster blits.")
         self.screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE + UI_HEIGHT))
         pygame.display.set_caption("Chess Game")
         self.font = pygame.font.Font(None, 64)
         self.ui_font = pygame.font.Font(None, UI_FONT_SIZE)
+        self.piece_glyphs = self._build_piece_glyphs()
+        self.board_bg = self._build_board_bg()
+        self._sel_highlight_surf = self._build_square_overlay(COLOR_HIGHLIGHT)
+        self._legal_move_surf = self._build_square_overlay(COLOR_LEGAL_MOVE)
+        self._text_cache = {}
+        self.button_surfs = self._build_button_surfs()
+        self._button_bar = self._build_button_bar()
         self.game = Game()
         
         self.selected_square = None
@@ -38,6 +54,77 @@ class ChessGUI:
         self.ai_move_result = None
         self.ai_lock = threading.Lock()
 
+        # The screen only changes on input, AI activity or a timer second, so
+        # frames are redrawn only when one of those has marked it dirty.
+        self._dirty = True
+        self._last_timer_tick = 0
+        # Formatted clock labels, kept until either clock reaches a new whole second
+        self._last_w_str = self._last_b_str = None; self._last_whole_second = None
+        # Screen regions to present, and the board as last presented (piece
+        # code and highlight per square) to find the squares that changed.
+        self._dirty_rects = []
+        self._shown_squares = None
+        self._ui_rect = pygame.Rect(0, WINDOW_SIZE, WINDOW_SIZE, UI_HEIGHT)
+
+    def _build_piece_glyphs(self):
+        """Renders each piece glyph once, with the offset that centres it on a square.
+
+        The result is indexed by piece code, like pieces.PIECES.
+        """
+        glyphs = [None] * len(PIECES)
+        for piece in PIECES:
+            if not piece: continue
+            text_color = COLOR_WHITE if piece.is_player1 else COLOR_BLACK
+            surf = self.font.render(piece.symbol, True, text_color).convert_alpha()
+            offset = (SQUARE_SIZE // 2 - surf.get_width() // 2, SQUARE_SIZE // 2 - surf.get_height() // 2)
+            glyphs[piece.code] = (surf, offset)
+        return glyphs
+
+    def _build_board_bg(self):
+        """Paints the static checkerboard once into a display-format surface."""
+        bg = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+        for r in range(BOARD_DIMENSION):
+            for c in range(BOARD_DIMENSION):
+                color = COLOR_LIGHT_SQUARE if (r + c) % 2 == 0 else COLOR_DARK_SQUARE
+                pygame.draw.rect(bg, color, (c * SQUARE_SIZE, r * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+        return bg.convert()
+
+    def _build_square_overlay(self, color):
+        """Builds a translucent square-sized overlay filled with color."""
+        overlay = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+        overlay.fill(color)
+        return overlay.convert_alpha()
+
+    def _build_button_surfs(self):
+        """Renders the static button labels once: (label, label rect, button rect) by name."""
+        surfs = {}
+        for button in BUTTONS:
+            rect = pygame.Rect(button['x'], BUTTON_ROW_Y, BUTTON_WIDTH, BUTTON_HEIGHT)
+            text_surf = self.ui_font.render(button['name'], True, COLOR_BLACK).convert_alpha()
+            surfs[button['name']] = (text_surf, text_surf.get_rect(center=rect.center), rect)
+        return surfs
+
+    def _build_button_bar(self):
+        """Paints every button in its idle colour onto one strip drawn at BUTTON_ROW_Y."""
+        bar = pygame.Surface((WINDOW_SIZE, BUTTON_HEIGHT))
+        bar.fill(COLOR_WHITE)
+        for button in BUTTONS:
+            pygame.draw.rect(bar, COLOR_BUTTON, (button['x'], 0, BUTTON_WIDTH, BUTTON_HEIGHT))
+            text_surf, text_rect, _ = self.button_surfs[button['name']]
+            bar.blit(text_surf, text_rect.move(0, -BUTTON_ROW_Y))
+        return bar.convert()
+
+    def _text(self, text):
+        """Returns the rendered surface for a UI string, rendering only on a cache miss."""
+        # Dicts keep insertion order, so re-inserting on every hit leaves the
+        # least recently used string first in line for eviction.
+        surf = self._text_cache.pop(text, None)
+        if surf is None:
+            surf = self.ui_font.render(text, True, COLOR_BLACK).convert_alpha()
+            if len(self._text_cache) >= TEXT_CACHE_SIZE: del self._text_cache[next(iter(self._text_cache))]
+        self._text_cache[text] = surf
+        return surf
+
     def _create_player(self, player_type):
         """Helper function to create and return an AI player object."""
         if player_type == "stockfish":
@@ -48,18 +135,23 @@ class ChessGUI:
 
     def run(self):
         """Main game loop."""
-        clock = pygame.time.Clock()
+        next_frame = time.perf_counter()
         while True:
             self._handle_ai_turn_start()
             self._process_ai_result()
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    # Cleanly quit any active AI engines
+                    # Stop any search in progress, then cleanly quit any active AI engines
+                    for player in (self.white_player, self.black_player):
+                        if player and hasattr(player, 'cancel'): player.cancel()
                     if self.white_player and hasattr(self.white_player, 'quit'): self.white_player.quit()
                     if self.black_player and hasattr(self.black_player, 'quit'): self.black_player.quit()
                     pygame.quit()
                     sys.exit()
+                if event.type in REPAINT_EVENTS:
+                    # The window contents may be lost, so present the whole frame, not just the changes
+                    self._dirty = True; self._shown_squares = None
                 
                 # Block input if an AI is thinking OR if it's an AI's turn in an AI vs AI game
                 is_human_turn = (self.game.get_current_player().color == 'white' and self.white_player is None) or \
@@ -67,10 +159,19 @@ class ChessGUI:
 
                 if not self.ai_is_thinking and is_human_turn:
                     self.handle_input(event)
+                    self._dirty = True
 
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            now = time.perf_counter()
+            if now - self._last_timer_tick >= 1.0:
+                self._last_timer_tick = now
+                self._dirty = True
+            if self._dirty:
+                self._mark_changed_squares()
+                self._dirty_rects.append(self._ui_rect)
+                self.draw()
+                self._present()
+                self._dirty = False
+            next_frame = self._wait_for_frame(next_frame)
 
     def _handle_ai_turn_start(self):
         """Checks if the current player is an AI and starts its thinking process."""
@@ -82,13 +183,15 @@ class ChessGUI:
 
         if is_ai_turn:
             self.ai_is_thinking = True
-            thread = threading.Thread(target=self._get_ai_move_threaded, args=(current_player_object,))
+            self._dirty = True
+            # Snapshot the position here so the worker never reads live game state
+            board = self.game.to_py_board()
+            thread = threading.Thread(target=self._get_ai_move_threaded, args=(current_player_object, board))
             thread.start()
 
-    def _get_ai_move_threaded(self, ai_player):
+    def _get_ai_move_threaded(self, ai_player, board):
         """This function runs in a separate thread to get the AI's move."""
-        fen = self.game.to_fen()
-        move = ai_player.get_best_move(fen)
+        move = ai_player.get_best_move(board)
         with self.ai_lock:
             self.ai_move_result = move
 
@@ -112,10 +215,13 @@ class ChessGUI:
                 print(f"ERROR: AI response '{move_to_make}' could not be parsed.")
             
             self.ai_is_thinking = False
+            self._dirty = True
 
     def handle_input(self, event):
         if self.pending_promotion: self.handle_promotion_input(event); return
-        if event.type == pygame.MOUSEMOTION: self.hovered_button = self._get_button_at(pygame.mouse.get_pos())
+        if event.type == pygame.MOUSEMOTION:
+            button = self._get_button_at(pygame.mouse.get_pos())
+            self.hovered_button = button['name'] if button else None
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             pos = pygame.mouse.get_pos()
             button = self._get_button_at(pos)
@@ -130,7 +236,7 @@ class ChessGUI:
         if coords[0] >= BOARD_DIMENSION: return
         if self.selected_square:
             moving_piece = self.game.get_piece_at(self.selected_square)
-            is_promotion = isinstance(moving_piece, Pawn) and coords[0] in (0, 7)
+            is_promotion = moving_piece.kind == KIND_P and coords[0] in (0, 7)
             if coords in self.legal_moves:
                 if is_promotion: self.pending_promotion = (self.selected_square, coords)
                 else:
@@ -157,58 +263,94 @@ class ChessGUI:
                 self._reset_ui_state()
             self.pending_promotion = None
 
+    def _wait_for_frame(self, next_frame):
+        """Waits until next_frame and returns the deadline of the frame after it."""
+        # Sleep is only accurate to a millisecond or so, so sleep until just
+        # short of the deadline and spin for the rest.
+        next_frame += FRAME_TIME
+        now = time.perf_counter()
+        if now > next_frame: return now  # Running behind; don't try to catch up
+        if next_frame - now > 0.001: time.sleep(next_frame - now - 0.001)
+        while time.perf_counter() < next_frame: time.sleep(0)
+        return next_frame
+
+    def _mark_square_dirty(self, r, c):
+        self._dirty_rects.append(pygame.Rect(c * SQUARE_SIZE, r * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+
+    def _mark_changed_squares(self):
+        """Marks every square whose piece or highlight changed since the last present."""
+        squares = bytearray(self.game.board)
+        for r_m, c_m in self.legal_moves: squares[r_m * BOARD_DIMENSION + c_m] |= 0x20
+        if self.selected_square:
+            r, c = self.selected_square
+            squares[r * BOARD_DIMENSION + c] |= 0x40
+        shown = self._shown_squares
+        if shown is None:
+            self._dirty_rects.append(pygame.Rect(0, 0, WINDOW_SIZE, WINDOW_SIZE))
+        else:
+            for sq in range(BOARD_DIMENSION * BOARD_DIMENSION):
+                if squares[sq] != shown[sq]: self._mark_square_dirty(*divmod(sq, BOARD_DIMENSION))
+        self._shown_squares = squares
+
+    def _present(self):
+        """Pushes the dirty regions to the display, or the whole frame when that is cheaper."""
+        area = sum(rect.w * rect.h for rect in self._dirty_rects)
+        if area > DIRTY_AREA_LIMIT or len(self._dirty_rects) > DIRTY_RECT_LIMIT:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._dirty_rects)
+        self._dirty_rects.clear()
+
     def draw(self):
         self.screen.fill(COLOR_WHITE)
         self.draw_board(); self.draw_highlights(); self.draw_pieces(); self.draw_ui()
 
     def draw_board(self):
-        for r in range(BOARD_DIMENSION):
-            for c in range(BOARD_DIMENSION):
-                color = COLOR_LIGHT_SQUARE if (r + c) % 2 == 0 else COLOR_DARK_SQUARE
-                pygame.draw.rect(self.screen, color, (c * SQUARE_SIZE, r * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+        self.screen.blit(self.board_bg, (0, 0))
 
     def draw_highlights(self):
         if not self.selected_square: return
         r, c = self.selected_square
-        s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-        s.fill(COLOR_HIGHLIGHT); self.screen.blit(s, (c * SQUARE_SIZE, r * SQUARE_SIZE))
-        s.fill(COLOR_LEGAL_MOVE)
-        for r_m, c_m in self.legal_moves: self.screen.blit(s, (c_m * SQUARE_SIZE, r_m * SQUARE_SIZE))
+        self.screen.blit(self._sel_highlight_surf, (c * SQUARE_SIZE, r * SQUARE_SIZE))
+        s = self._legal_move_surf
+        self._blit_batch([(s, (c_m * SQUARE_SIZE, r_m * SQUARE_SIZE)) for r_m, c_m in self.legal_moves])
 
     def draw_pieces(self):
-        for r in range(BOARD_DIMENSION):
-            for c in range(BOARD_DIMENSION):
-                piece = self.game.board[r][c]
-                if piece:
-                    symbol = PIECE_SYMBOLS[piece.color][piece.name]
-                    color = COLOR_WHITE if symbol.isupper() else COLOR_BLACK
-                    text_surf = self.font.render(symbol, True, color)
-                    text_rect = text_surf.get_rect(center=(c * SQUARE_SIZE + SQUARE_SIZE // 2, r * SQUARE_SIZE + SQUARE_SIZE // 2))
-                    self.screen.blit(text_surf, text_rect)
+        # Collect every glyph first and hand them to SDL in one batch.
+        batch = []
+        for piece, r, c in self.game.piece_positions():
+            surf, (ox, oy) = self.piece_glyphs[piece.code]
+            batch.append((surf, (c * SQUARE_SIZE + ox, r * SQUARE_SIZE + oy)))
+        self._blit_batch(batch)
+
+    def _blit_batch(self, batch):
+        """Blits a list of (surface, position) pairs onto the screen in one call."""
+        if IS_CE: self.screen.fblits(batch)
+        else: self.screen.blits(batch, False)
 
     def draw_ui(self):
-        white_cap_str = "".join(PIECE_SYMBOLS['black'][p.name] for p in self.game.white_captured)
-        black_cap_str = "".join(PIECE_SYMBOLS['white'][p.name] for p in self.game.black_captured)
-        self.screen.blit(self.ui_font.render(f"White captured: {white_cap_str}", True, COLOR_BLACK), (10, CAPTURED_ROW_Y))
-        self.screen.blit(self.ui_font.render(f"Black captured: {black_cap_str}", True, COLOR_BLACK), (10, CAPTURED_ROW_Y + UI_LINE_HEIGHT))
+        # Each row shows its pieces in the opposite side's letter case
+        white_cap_str = "".join(p.symbol for p in self.game.white_captured).swapcase()
+        black_cap_str = "".join(p.symbol for p in self.game.black_captured).swapcase()
+        self.screen.blit(self._text(f"White captured: {white_cap_str}"), (10, CAPTURED_ROW_Y))
+        self.screen.blit(self._text(f"Black captured: {black_cap_str}"), (10, CAPTURED_ROW_Y + UI_LINE_HEIGHT))
         last_move_str = f"Last Move: {self.game.move_history[-1].to_notation()}" if self.game.move_history else "Last Move: None"
-        self.screen.blit(self.ui_font.render(last_move_str, True, COLOR_BLACK), (10, LAST_MOVE_ROW_Y))
+        self.screen.blit(self._text(last_move_str), (10, LAST_MOVE_ROW_Y))
         white_time, black_time = self._get_display_times()
-        self.screen.blit(self.ui_font.render(f"White: {white_time}", True, COLOR_BLACK), (10, TIMER_ROW_Y))
-        self.screen.blit(self.ui_font.render(f"Black: {black_time}", True, COLOR_BLACK), (200, TIMER_ROW_Y))
+        self.screen.blit(self._text(f"White: {white_time}"), (10, TIMER_ROW_Y))
+        self.screen.blit(self._text(f"Black: {black_time}"), (200, TIMER_ROW_Y))
         player_color = self.game.get_current_player().color.title()
         status_text = f"{player_color}'s Turn | {self.game.game_state.title()}"
         if self.pending_promotion: status_text = "Promote pawn: Press Q, R, B, or N"
         if self.ai_is_thinking: 
             current_ai_type = self.white_player_type if self.game.get_current_player().color == 'white' else self.black_player_type
             status_text = f"{current_ai_type.title()} is thinking..."
-        self.screen.blit(self.ui_font.render(status_text, True, COLOR_BLACK), (10, STATUS_ROW_Y))
-        for button in BUTTONS:
-            rect = pygame.Rect(button['x'], BUTTON_ROW_Y, BUTTON_WIDTH, BUTTON_HEIGHT)
-            color = COLOR_BUTTON_HOVER if self.hovered_button == button['name'] else COLOR_BUTTON
-            pygame.draw.rect(self.screen, color, rect)
-            text_surf = self.ui_font.render(button['name'], True, COLOR_BLACK)
-            self.screen.blit(text_surf, text_surf.get_rect(center=rect.center))
+        self.screen.blit(self._text(status_text), (10, STATUS_ROW_Y))
+        self.screen.blit(self._button_bar, (0, BUTTON_ROW_Y))
+        if self.hovered_button:
+            text_surf, text_rect, rect = self.button_surfs[self.hovered_button]
+            pygame.draw.rect(self.screen, COLOR_BUTTON_HOVER, rect)
+            self.screen.blit(text_surf, text_rect)
 
     def _parse_ai_move(self, move_str):
         try:
@@ -231,8 +373,13 @@ class ChessGUI:
         elapsed = time.time() - self.game.turn_start_time
         if self.game.get_current_player().is_player1: w_time += elapsed
         else: b_time += elapsed
-        format_time = lambda t: f"{int(t // 60):02d}:{int(t % 60):02d}"
-        return format_time(w_time), format_time(b_time)
+        # The labels only change once a clock passes a whole second
+        whole_seconds = (int(w_time), int(b_time))
+        if whole_seconds != self._last_whole_second:
+            format_time = lambda t: f"{t // 60:02d}:{t % 60:02d}"
+            self._last_w_str = format_time(whole_seconds[0]); self._last_b_str = format_time(whole_seconds[1])
+            self._last_whole_second = whole_seconds
+        return self._last_w_str, self._last_b_str
 
     def _reset_ui_state(self): self.selected_square = None; self.legal_moves = []
     def _reset_game_state(self): self.game = Game(); self._reset_ui_state()
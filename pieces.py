@@ -1,160 +1,154 @@
 # pieces.py
 # Chess piece classes
 
-from config import BOARD_DIMENSION
+from config import BOARD_DIMENSION, PIECE_SYMBOLS
+from bitboard import (rook_attacks, bishop_attacks, KNIGHT_ATTACKS,
+                      KING_ATTACKS, PAWN_ATTACKS, PAWN_PUSHES)
+
+# Piece type ids, stored on each class as `kind` so hot paths can compare ints
+# instead of walking isinstance checks.
+KIND_P, KIND_N, KIND_B, KIND_R, KIND_Q, KIND_K = range(6)
+
+# Piece codes, one byte per square in Game.board: kind + 1 in the KIND_MASK
+# bits, BLACK set for black pieces, EMPTY for an empty square.
+EMPTY = 0
+KIND_MASK = 7
+BLACK = 8
+
+
+def piece_code(kind, is_black):
+    """Returns the piece code for a piece kind and color."""
+    return kind + 1 | (BLACK if is_black else 0)
+
+
+# Double pushes are only possible from a pawn's starting rank, indexed like
+# PAWN_PUSHES (0 white, 1 black).
+_PAWN_START_RANKS = (0x00FF000000000000, 0x000000000000FF00)
 
 
 class Piece:
-    """Base class for all chess pieces."""
+    """Base class for all chess pieces.
+
+    Pieces hold no per-game state, so one shared instance per piece code
+    (see PIECES) stands for every piece of that color and type.
+    """
 
     def __init__(self, name, is_player1):
         self.name = name
         self.is_player1 = is_player1
         self.color = 'white' if is_player1 else 'black'
-        self.has_moved = False
+        self.key = self.color[0] + name  # Bitboard key, e.g. 'wP'
+        self.symbol = PIECE_SYMBOLS[self.color][name]  # FEN letter, e.g. 'p'
+        self.code = piece_code(self.kind, not is_player1)
 
-    def get_moves(self, board, start_coords, move_history=None):
-        """Base method to be overridden by subclasses."""
-        return []
+    def get_moves(self, sq, own_occ, enemy_occ, move_history=None):
+        """Base method to be overridden by subclasses.
+
+        sq is the piece's square index (row * 8 + col); own_occ and enemy_occ
+        are the occupancy bitboards of this piece's side and the opposing side.
+        Returns the bitboard of destination squares.
+        """
+        return 0
 
     def is_enemy(self, other_piece):
         """Check if another piece is an enemy."""
-        return other_piece is not None and other_piece.is_player1 != self.is_player1
-
-    def _get_sliding_moves(self, board, start_coords, directions):
-        """Helper method to get moves for sliding pieces (Rook, Bishop, Queen)."""
-        moves = []
-        row, col = start_coords
-        for dr, dc in directions:
-            for i in range(1, BOARD_DIMENSION):
-                new_row, new_col = row + i * dr, col + i * dc
-                if not (0 <= new_row < BOARD_DIMENSION
-                        and 0 <= new_col < BOARD_DIMENSION):
-                    break
-
-                target = board[new_row][new_col]
-                if target is None:
-                    moves.append((new_row, new_col))
-                elif self.is_enemy(target):
-                    moves.append((new_row, new_col))
-                    break
-                else:  # Friendly piece
-                    break
-        return moves
+        return other_piece is not None and \
+            (self.code ^ other_piece.code) & BLACK != 0
 
 
 class Pawn(Piece):
+    kind = KIND_P
 
     def __init__(self, is_player1):
         super().__init__('P', is_player1)
 
-    def get_moves(self, board, start_coords, move_history=None):
-        moves = []
-        row, col = start_coords
-        direction = -1 if self.is_player1 else 1
-
-        # Standard forward moves
-        one_step_row = row + direction
-        if 0 <= one_step_row < BOARD_DIMENSION and board[one_step_row][
-                col] is None:
-            moves.append((one_step_row, col))
-            if not self.has_moved:
-                two_step_row = row + 2 * direction
-                if 0 <= two_step_row < BOARD_DIMENSION and board[two_step_row][
-                        col] is None:
-                    moves.append((two_step_row, col))
-
-        # Standard captures
-        for dc in [-1, 1]:
-            new_row, new_col = row + direction, col + dc
-            if 0 <= new_row < BOARD_DIMENSION and 0 <= new_col < BOARD_DIMENSION:
-                if self.is_enemy(board[new_row][new_col]):
-                    moves.append((new_row, new_col))
+    def get_moves(self, sq, own_occ, enemy_occ, move_history=None):
+        side = 0 if self.is_player1 else 1
+        step = -BOARD_DIMENSION if self.is_player1 else BOARD_DIMENSION
+        empty = ~(own_occ | enemy_occ)
+
+        # Forward moves; the double step needs the single step to be free.
+        push = PAWN_PUSHES[side][sq] & empty
+        if push and _PAWN_START_RANKS[side] >> sq & 1:
+            push |= PAWN_PUSHES[side][sq + step] & empty
+        targets = push | PAWN_ATTACKS[side][sq] & enemy_occ
 
         # En Passant
         if move_history:
             last_move = move_history[-1]
-            if (isinstance(last_move.piece_moved, Pawn)
+            row, col = divmod(sq, BOARD_DIMENSION)
+            if (last_move.piece_moved.kind == KIND_P
                     and abs(last_move.start_coords[0] -
                             last_move.end_coords[0]) == 2
                     and last_move.end_coords[0] == row
                     and abs(last_move.end_coords[1] - col) == 1):
-                moves.append((row + direction, last_move.end_coords[1]))
+                targets |= 1 << (sq + step + last_move.end_coords[1] - col)
 
-        return moves
+        return targets
 
 
 class Rook(Piece):
+    kind = KIND_R
 
     def __init__(self, is_player1):
         super().__init__('R', is_player1)
 
-    def get_moves(self, board, start_coords, move_history=None):
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        return self._get_sliding_moves(board, start_coords, directions)
+    def get_moves(self, sq, own_occ, enemy_occ, move_history=None):
+        return rook_attacks(sq, own_occ | enemy_occ) & ~own_occ
 
 
 class Knight(Piece):
+    kind = KIND_N
 
     def __init__(self, is_player1):
         super().__init__('N', is_player1)
 
-    def get_moves(self, board, start_coords, move_history=None):
-        moves = []
-        row, col = start_coords
-        knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2),
-                        (2, -1), (2, 1)]
-        for dr, dc in knight_moves:
-            new_row, new_col = row + dr, col + dc
-            if 0 <= new_row < BOARD_DIMENSION and 0 <= new_col < BOARD_DIMENSION:
-                target = board[new_row][new_col]
-                if target is None or self.is_enemy(target):
-                    moves.append((new_row, new_col))
-        return moves
+    def get_moves(self, sq, own_occ, enemy_occ, move_history=None):
+        return KNIGHT_ATTACKS[sq] & ~own_occ
 
 
 class Bishop(Piece):
+    kind = KIND_B
 
     def __init__(self, is_player1):
         super().__init__('B', is_player1)
 
-    def get_moves(self, board, start_coords, move_history=None):
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        return self._get_sliding_moves(board, start_coords, directions)
+    def get_moves(self, sq, own_occ, enemy_occ, move_history=None):
+        return bishop_attacks(sq, own_occ | enemy_occ) & ~own_occ
 
 
 class Queen(Piece):
+    kind = KIND_Q
 
     def __init__(self, is_player1):
         super().__init__('Q', is_player1)
 
-    def get_moves(self, board, start_coords, move_history=None):
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1),
-                      (-1, 1), (-1, -1)]
-        return self._get_sliding_moves(board, start_coords, directions)
+    def get_moves(self, sq, own_occ, enemy_occ, move_history=None):
+        occ = own_occ | enemy_occ
+        return (rook_attacks(sq, occ) | bishop_attacks(sq, occ)) & ~own_occ
 
 
 class King(Piece):
+    kind = KIND_K
 
     def __init__(self, is_player1):
         super().__init__('K', is_player1)
 
-    def get_moves(self, board, start_coords, move_history=None):
-        moves = []
-        row, col = start_coords
-        # Standard 1-square moves
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0: continue
-                new_row, new_col = row + dr, col + dc
-                if 0 <= new_row < BOARD_DIMENSION and 0 <= new_col < BOARD_DIMENSION:
-                    target = board[new_row][new_col]
-                    if target is None or self.is_enemy(target):
-                        moves.append((new_row, new_col))
-
-        # Propose castling moves (validation happens in engine)
-        if not self.has_moved:
-            moves.append((row, col + 2))  # Kingside
-            moves.append((row, col - 2))  # Queenside
-
-        return moves
+    def get_moves(self, sq, own_occ, enemy_occ, move_history=None):
+        # Standard 1-square moves; castling is generated by the engine, which
+        # has to check the rook and the attacked squares anyway.
+        return KING_ATTACKS[sq] & ~own_occ
+
+
+def _build_flyweights():
+    """Creates the shared instance for every piece code."""
+    pieces = [None] * 16
+    for piece_class in (Pawn, Knight, Bishop, Rook, Queen, King):
+        for is_player1 in (True, False):
+            piece = piece_class(is_player1)
+            pieces[piece.code] = piece
+    return tuple(pieces)
+
+
+# The shared Piece for each code; None for EMPTY and unused codes.
+PIECES = _build_flyweights()
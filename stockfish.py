@@ -28,6 +28,7 @@ class StockfishPlayer:
         """
         self.engine = None
         self.time_limit = time_limit
+        self._analysis = None  # The search in progress, so cancel() can stop it
         try:
             # This will work if stockfish is in your system's PATH.
             # If not, it will fail, and you must set the STOCKFISH_PATH manually.
@@ -41,20 +42,26 @@ class StockfishPlayer:
         except Exception as e:
             print(f"ERROR: Could not load Stockfish engine: {e}")
 
-    def get_best_move(self, fen_string):
+    def get_best_move(self, board):
         """
-        Given the current board state in FEN, asks Stockfish for the best move.
+        Given the current position as a python-chess Board, asks Stockfish for the best move.
+        The board is searched as is, so the caller should hand over a copy it no longer touches.
         """
         if not self.engine:
             print("ERROR: Stockfish engine is not available.")
             return None
 
         try:
-            board = chess.Board(fen_string)
             print(f"LOG (Stockfish Thread @ {time.strftime('%H:%M:%S')}): Analyzing position...")
             
-            # Ask the engine to analyze the position for a fixed amount of time
-            result = self.engine.play(board, chess.engine.Limit(time=self.time_limit))
+            # Analyze for at most time_limit; cancel() can end the search early
+            with self.engine.analysis(board, chess.engine.Limit(time=self.time_limit)) as analysis:
+                self._analysis = analysis
+                result = analysis.wait()
+            self._analysis = None
+            if result.move is None:
+                print("ERROR: Stockfish returned no move.")
+                return None
             move = result.move.uci() # The move is returned in UCI format (e.g., 'e2e4')
             
             print(f"LOG (Stockfish Thread @ {time.strftime('%H:%M:%S')}): Stockfish suggests move: {move}")
@@ -63,6 +70,12 @@ class StockfishPlayer:
             print(f"An error occurred during Stockfish analysis: {e}")
             return None
 
+    def cancel(self):
+        """Stops a search in progress; get_best_move returns its best move so far."""
+        analysis = self._analysis
+        if analysis:
+            analysis.stop()
+
     def quit(self):
         """Closes the Stockfish engine process to free up resources."""
         if self.engine: